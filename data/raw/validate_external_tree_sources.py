@@ -6,11 +6,13 @@
 
 import json
 import sys
+from collections.abc import Iterator
 from dataclasses import dataclass
 
 import requests
 
 HEADERS = {"User-Agent": "sf-tree-enrichment-validation/1.0 (github.com/sf-tree-reporting)"}
+PREVIEW_CHARS = 240
 
 
 @dataclass
@@ -23,6 +25,8 @@ class SourceResult:
 
 def normalize_candidates(species: str) -> list[str]:
     s = species.strip()
+    if "×" not in s and " x " not in s:
+        return [s]
     variants = [s]
     if "×" in s:
         variants.append(s.replace("×", "x"))
@@ -39,7 +43,7 @@ def normalize_candidates(species: str) -> list[str]:
     return out
 
 
-def fetch_powo_text(scientific_name: str) -> str | None:
+def fetch_powo_text(scientific_name: str, max_preview: int | None = None) -> str | None:
     r = requests.get(
         "https://powo.science.kew.org/api/2/search",
         params={"q": scientific_name, "f": "species_f"},
@@ -65,7 +69,21 @@ def fetch_powo_text(scientific_name: str) -> str | None:
         return None
     data = r2.json()
 
+    # Parts are produced lazily, so a preview stops walking the description tree
+    # once it is long enough. `running` counts a separator per part, so the joined
+    # text is running - 1 chars.
     parts = []
+    running = 0
+    for chunk in _iter_powo_parts(data):
+        if max_preview is not None and running > max_preview:
+            break
+        parts.append(chunk)
+        running += len(chunk) + 1
+
+    return "\n".join(parts) if parts else None
+
+
+def _iter_powo_parts(data: dict) -> Iterator[str]:
     descriptions = data.get("descriptions", {})
     if isinstance(descriptions, dict):
         for source_name, source_payload in descriptions.items():
@@ -82,17 +100,15 @@ def fetch_powo_text(scientific_name: str) -> str | None:
                         continue
                     text = item.get("description", "")
                     if text:
-                        parts.append(f"{source_name}/{characteristic}: {text}")
+                        yield f"{source_name}/{characteristic}: {text}"
 
     dist = data.get("distribution", {})
     natives = [region.get("name") for region in dist.get("natives", []) if region.get("name")]
     if natives:
-        parts.append(f"Native distribution: {', '.join(natives)}")
-
-    return "\n".join(parts) if parts else None
+        yield f"Native distribution: {', '.join(natives)}"
 
 
-def fetch_gbif_text(scientific_name: str) -> str | None:
+def fetch_gbif_text(scientific_name: str, max_preview: int | None = None) -> str | None:
     r = requests.get(
         "https://api.gbif.org/v1/species/match",
         params={"name": scientific_name, "verbose": "true"},
@@ -105,18 +121,23 @@ def fetch_gbif_text(scientific_name: str) -> str | None:
     if not data.get("usageKey") and not data.get("speciesKey"):
         return None
 
+    fields = [
+        ("scientificName", "Matched scientific name"),
+        ("canonicalName", "Canonical name"),
+        ("family", "Family"),
+        ("order", "Order"),
+        ("status", "Taxonomic status"),
+    ]
     parts = []
-    if data.get("scientificName"):
-        parts.append(f"Matched scientific name: {data['scientificName']}")
-    if data.get("canonicalName"):
-        parts.append(f"Canonical name: {data['canonicalName']}")
-    if data.get("family"):
-        parts.append(f"Family: {data['family']}")
-    if data.get("order"):
-        parts.append(f"Order: {data['order']}")
-    if data.get("status"):
-        parts.append(f"Taxonomic status: {data['status']}")
-    if data.get("confidence") is not None:
+    running = 0
+    for key, label in fields:
+        if max_preview is not None and running > max_preview:
+            break
+        if data.get(key):
+            chunk = f"{label}: {data[key]}"
+            parts.append(chunk)
+            running += len(chunk) + 1
+    if data.get("confidence") is not None and (max_preview is None or running <= max_preview):
         parts.append(f"Match confidence: {data['confidence']}")
 
     return "\n".join(parts) if parts else None
@@ -126,9 +147,9 @@ def validate_source(source: str, species: str) -> SourceResult:
     fetcher = fetch_powo_text if source == "POWO" else fetch_gbif_text
     for candidate in normalize_candidates(species):
         try:
-            text = fetcher(candidate)
+            text = fetcher(candidate, max_preview=PREVIEW_CHARS)
             if text:
-                return SourceResult(source=source, species=candidate, ok=True, detail=text[:240])
+                return SourceResult(source=source, species=candidate, ok=True, detail=text[:PREVIEW_CHARS])
         except Exception as e:
             return SourceResult(source=source, species=candidate, ok=False, detail=f"error: {e}")
     return SourceResult(source=source, species=species, ok=False, detail="no result")
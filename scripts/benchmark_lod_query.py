@@ -2,24 +2,56 @@
 """Benchmark z15 detailed LOD query strategies in standalone DuckDB.
 
 Usage:
-  C:/Users/ethan/coding_projects/sf_tree_reporting/.venv/Scripts/python.exe scripts/benchmark_lod_query.py
+  C:/Users/ethan/coding_projects/sf_tree_reporting/.venv/Scripts/python.exe scripts/benchmark_lod_query.py [--rebuild]
 """
 
 from __future__ import annotations
 
+import argparse
+import os
 import statistics
 import time
 from pathlib import Path
 
 import duckdb
 
+from parquet_cache import CACHE_DIR, RAW_TREE_COLUMNS, TREE_CATEGORY_ENUM_SQL, ensure_parquet, tree_category_sql
+
 ROOT = Path(__file__).resolve().parents[1]
 RAW_JSON = ROOT / "data" / "raw_data.json"
 SPECIES_JSON = ROOT / "data" / "species_data.json"
+BENCH_DB = CACHE_DIR / "bench.duckdb"
+
+# Only the join key and category are used here; skipping the rest avoids parsing icons.
+SPECIES_COLUMNS = {
+    "species": "VARCHAR",
+    "tree_category": "VARCHAR",
+}
 
 WEB_MERCATOR_MAX = 20037508.342789244
 WEB_MERCATOR_WORLD = WEB_MERCATOR_MAX * 2
 ZOOM = 15
+# Constant divisors/multipliers inlined as SQL literals instead of per-row pow(2, z).
+TILE_SPAN_M = WEB_MERCATOR_WORLD / (1 << ZOOM)
+POW2 = {z: float(1 << z) for z in (15, 17)}
+
+
+def _source_mtimes() -> tuple[float, float | None]:
+    species_mtime = SPECIES_JSON.stat().st_mtime if SPECIES_JSON.exists() else None
+    return RAW_JSON.stat().st_mtime, species_mtime
+
+
+def _bench_db_is_fresh(con: duckdb.DuckDBPyConnection) -> bool:
+    """True when bench.duckdb already holds trees_fast built from the current JSON exports."""
+    tables = con.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_name IN ('trees_fast', 'bench_meta')
+        """
+    ).fetchone()[0]
+    if tables != 2:
+        return False
+    return con.execute("SELECT raw_mtime, species_mtime FROM bench_meta").fetchone() == _source_mtimes()
 
 
 def run_timed(con: duckdb.DuckDBPyConnection, sql: str, runs: int = 5) -> tuple[float, float, float]:
@@ -34,21 +66,23 @@ def run_timed(con: duckdb.DuckDBPyConnection, sql: str, runs: int = 5) -> tuple[
 
 
 def setup(con: duckdb.DuckDBPyConnection) -> None:
+    # species_key is normalized once at load so joins compare raw columns
+    # instead of running lower(trim(...)) on both sides for every row.
     con.execute(
         """
         CREATE OR REPLACE TABLE trees AS
-        SELECT * FROM read_json_auto(?);
+        SELECT *, lower(trim(species)) AS species_key FROM read_parquet(?);
         """,
-        [str(RAW_JSON)],
+        [str(ensure_parquet(RAW_JSON, RAW_TREE_COLUMNS))],
     )
 
     if SPECIES_JSON.exists():
         con.execute(
             """
             CREATE OR REPLACE TABLE species_enrichment AS
-            SELECT * FROM read_json_auto(?);
+            SELECT *, lower(trim(species)) AS species_key FROM read_parquet(?);
             """,
-            [str(SPECIES_JSON)],
+            [str(ensure_parquet(SPECIES_JSON, SPECIES_COLUMNS))],
         )
     else:
         con.execute(
@@ -56,11 +90,25 @@ def setup(con: duckdb.DuckDBPyConnection) -> None:
             CREATE OR REPLACE TABLE species_enrichment AS
             SELECT
               ''::VARCHAR AS species,
-              'default'::VARCHAR AS tree_category
+              'default'::VARCHAR AS tree_category,
+              ''::VARCHAR AS species_key
             WHERE FALSE;
             """
         )
 
+    # Map categories once per species (hundreds of rows) instead of once per tree
+    # in every query; the enum makes downstream compares 1-byte integer compares.
+    con.execute(f"CREATE TYPE IF NOT EXISTS tree_category_enum AS {TREE_CATEGORY_ENUM_SQL};")
+    con.execute(
+        f"""
+        CREATE OR REPLACE TABLE species_enrichment AS
+        SELECT
+          *,
+          {tree_category_sql('tree_category')} AS category
+        FROM species_enrichment;
+        """
+    )
+
 
 def build_precomputed(con: duckdb.DuckDBPyConnection) -> float:
     t0 = time.perf_counter()
@@ -74,24 +122,26 @@ def build_precomputed(con: duckdb.DuckDBPyConnection) -> float:
             t.latitude,
             t.longitude,
             COALESCE(t.diameter_at_breast_height, 3) AS dbh,
-            CASE lower(trim(COALESCE(se.tree_category, 'default')))
-              WHEN 'palm' THEN 'palm'
-              WHEN 'broadleaf' THEN 'broadleaf'
-              WHEN 'spreading' THEN 'spreading'
-              WHEN 'coniferous' THEN 'coniferous'
-              WHEN 'columnar' THEN 'columnar'
-              WHEN 'ornamental' THEN 'ornamental'
-              ELSE 'default'
-            END AS category,
-            LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878) AS latitude_clamped,
+            COALESCE(se.category, 'default'::tree_category_enum) AS category,
             ((t.longitude + 180.0) / 360.0) AS x_norm,
-            ((1.0 - ln(tan(radians(LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878))) +
-            (1.0 / cos(radians(LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878))))) / pi()) / 2.0) AS y_norm
+            sin(radians(LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878))) AS sin_lat
           FROM trees t
           LEFT JOIN species_enrichment se
             ON t.species = se.species
           WHERE t.latitude IS NOT NULL
             AND t.longitude IS NOT NULL
+        ),
+        projected AS (
+          SELECT
+            *,
+            (0.5 * ln((1.0 + sin_lat) / (1.0 - sin_lat))) AS mercator_y
+          FROM joined
+        ),
+        normalized AS (
+          SELECT
+            *,
+            ((1.0 - mercator_y / pi()) / 2.0) AS y_norm
+          FROM projected
         )
         SELECT
           tree_id,
@@ -99,12 +149,12 @@ def build_precomputed(con: duckdb.DuckDBPyConnection) -> float:
           TRY_CAST(dbh AS DOUBLE) AS dbh,
           category,
           ((longitude * {WEB_MERCATOR_MAX}) / 180.0) AS x_3857,
-          (6378137.0 * ln(tan(pi() / 4.0 + radians(latitude_clamped) / 2.0))) AS y_3857,
-          CAST(floor(x_norm * pow(2, 15)) AS INTEGER) AS xtile_z15,
-          CAST(floor(y_norm * pow(2, 15)) AS INTEGER) AS ytile_z15,
-          CAST(floor(x_norm * pow(2, 17)) AS INTEGER) AS xtile_z17,
-          CAST(floor(y_norm * pow(2, 17)) AS INTEGER) AS ytile_z17
-        FROM joined;
+          (6378137.0 * mercator_y) AS y_3857,
+          CAST(floor(x_norm * {POW2[15]}) AS INTEGER) AS xtile_z15,
+          CAST(floor(y_norm * {POW2[15]}) AS INTEGER) AS ytile_z15,
+          CAST(floor(x_norm * {POW2[17]}) AS INTEGER) AS xtile_z17,
+          CAST(floor(y_norm * {POW2[17]}) AS INTEGER) AS ytile_z17
+        FROM normalized;
         """
     )
     return (time.perf_counter() - t0) * 1000
@@ -114,10 +164,22 @@ def main() -> None:
     if not RAW_JSON.exists():
         raise SystemExit(f"Missing {RAW_JSON}")
 
-    con = duckdb.connect(database=":memory:")
-    con.execute("PRAGMA threads=8")
-
-    setup(con)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild bench.duckdb even if it is up to date")
+    args = parser.parse_args()
+
+    # Keep the loaded and precomputed tables in a database file so repeat runs only
+    # pay for the queries under test.
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(database=str(BENCH_DB))
+    # Use every core. Large sorts/aggregates spill to DuckDB's per-database default
+    # (bench.duckdb.tmp next to the file), and the default memory_limit (80% of RAM)
+    # already scales with the machine.
+    con.execute(f"PRAGMA threads={max(1, os.cpu_count() or 4)}")
+
+    cached = not args.rebuild and _bench_db_is_fresh(con)
+    if not cached:
+        setup(con)
     rows = con.execute("SELECT COUNT(*) FROM trees").fetchone()[0]
     print(f"rows={rows}")
 
@@ -125,26 +187,18 @@ def main() -> None:
     WITH pts AS (
       SELECT
         CAST(
-          floor((((longitude * {WEB_MERCATOR_MAX}) / 180.0) + {WEB_MERCATOR_MAX}) / ({WEB_MERCATOR_WORLD} / pow(2, {ZOOM})))
+          floor((((longitude * {WEB_MERCATOR_MAX}) / 180.0) + {WEB_MERCATOR_MAX}) / {TILE_SPAN_M})
           AS INTEGER
         ) AS xtile,
         CAST(
-          floor(({WEB_MERCATOR_MAX} - (6378137.0 * ln(tan(pi() / 4.0 + radians(LEAST(GREATEST(latitude, -85.05112878), 85.05112878)) / 2.0)))) / ({WEB_MERCATOR_WORLD} / pow(2, {ZOOM})))
+          floor(({WEB_MERCATOR_MAX} - (6378137.0 * ln(tan(pi() / 4.0 + radians(LEAST(GREATEST(latitude, -85.05112878), 85.05112878)) / 2.0)))) / {TILE_SPAN_M})
           AS INTEGER
         ) AS ytile,
         COALESCE(diameter_at_breast_height, 3) AS dbh,
-        CASE lower(trim(COALESCE(se.tree_category, 'default')))
-          WHEN 'palm' THEN 'palm'
-          WHEN 'broadleaf' THEN 'broadleaf'
-          WHEN 'spreading' THEN 'spreading'
-          WHEN 'coniferous' THEN 'coniferous'
-          WHEN 'columnar' THEN 'columnar'
-          WHEN 'ornamental' THEN 'ornamental'
-          ELSE 'default'
-        END AS category
+        COALESCE(se.category, 'default'::tree_category_enum) AS category
       FROM trees t
       LEFT JOIN species_enrichment se
-        ON lower(trim(t.species)) = lower(trim(se.species))
+        ON t.species_key = se.species_key
       WHERE latitude IS NOT NULL AND longitude IS NOT NULL
     )
     SELECT xtile, ytile, COUNT(*) AS n, AVG(dbh) AS avg_dbh
@@ -155,8 +209,16 @@ def main() -> None:
     mean, median, best = run_timed(con, baseline_sql)
     print(f"baseline_z15_detailed_batch_ms mean={mean:.1f} median={median:.1f} best={best:.1f}")
 
-    precompute_ms = build_precomputed(con)
-    print(f"precompute_trees_fast_ms={precompute_ms:.1f}")
+    if cached:
+        print(f"precompute_trees_fast_ms skipped (cached in {BENCH_DB}, pass --rebuild to redo)")
+    else:
+        precompute_ms = build_precomputed(con)
+        print(f"precompute_trees_fast_ms={precompute_ms:.1f}")
+        raw_mtime, species_mtime = _source_mtimes()
+        con.execute(
+            "CREATE OR REPLACE TABLE bench_meta AS SELECT ?::DOUBLE AS raw_mtime, ?::DOUBLE AS species_mtime",
+            [raw_mtime, species_mtime],
+        )
 
     precomputed_global_sql = """
     SELECT xtile_z15 AS xtile, ytile_z15 AS ytile, COUNT(*) AS n, AVG(dbh) AS avg_dbh
@@ -170,8 +232,8 @@ def main() -> None:
     center = con.execute(
         f"""
         SELECT
-          CAST(floor(((-122.44 + 180.0) / 360.0) * pow(2, 17)) AS INTEGER) AS cx,
-          CAST(floor(((1.0 - ln(tan(radians(37.76)) + 1.0 / cos(radians(37.76))) / pi()) / 2.0) * pow(2, 17)) AS INTEGER) AS cy
+          CAST(floor(((-122.44 + 180.0) / 360.0) * {POW2[17]}) AS INTEGER) AS cx,
+          CAST(floor(((1.0 - ln(tan(radians(37.76)) + 1.0 / cos(radians(37.76))) / pi()) / 2.0) * {POW2[17]}) AS INTEGER) AS cy
         """
     ).fetchone()
     cx, cy = int(center[0]), int(center[1])
@@ -202,10 +264,10 @@ def main() -> None:
     print(f"materialize_z15_tile_stats_ms={z15_build_ms:.1f}")
 
     center15 = con.execute(
-        """
+        f"""
         SELECT
-          CAST(floor(((-122.44 + 180.0) / 360.0) * pow(2, 15)) AS INTEGER) AS cx,
-          CAST(floor(((1.0 - ln(tan(radians(37.76)) + 1.0 / cos(radians(37.76))) / pi()) / 2.0) * pow(2, 15)) AS INTEGER) AS cy
+          CAST(floor(((-122.44 + 180.0) / 360.0) * {POW2[15]}) AS INTEGER) AS cx,
+          CAST(floor(((1.0 - ln(tan(radians(37.76)) + 1.0 / cos(radians(37.76))) / pi()) / 2.0) * {POW2[15]}) AS INTEGER) AS cy
         """
     ).fetchone()
     c15x, c15y = int(center15[0]), int(center15[1])
@@ -231,6 +293,28 @@ def main() -> None:
         spatial_ok = False
 
     if spatial_ok:
+      # Build point geometries once per tree and tile envelopes once per z15 tile, so
+      # MVT queries only clip instead of constructing both for every row on every run.
+      # The geometry copy is a temp table shadowing main.trees_fast, which keeps the
+      # cached database free of spatial types.
+      t0 = time.perf_counter()
+      con.execute(
+        """
+        CREATE OR REPLACE TEMP TABLE trees_fast AS
+        SELECT *, ST_Point(x_3857, y_3857) AS geom
+        FROM main.trees_fast;
+        """
+      )
+      con.execute(
+        """
+        CREATE OR REPLACE TEMP TABLE z15_tile_envelopes AS
+        SELECT xtile_z15, ytile_z15, ST_Extent(ST_TileEnvelope(15, xtile_z15, ytile_z15)) AS tile_env
+        FROM (SELECT DISTINCT xtile_z15, ytile_z15 FROM trees_fast);
+        """
+      )
+      geom_build_ms = (time.perf_counter() - t0) * 1000
+      print(f"precompute_geom_and_z15_envelopes_ms={geom_build_ms:.1f}")
+
       mvt_precomputed_sql = """
       WITH rows AS (
         SELECT
@@ -238,18 +322,19 @@ def main() -> None:
           ytile_z15 AS ytile,
           {
             'geom': ST_AsMVTGeom(
-              ST_Point(x_3857, y_3857),
-              ST_Extent(ST_TileEnvelope(15, xtile_z15, ytile_z15)),
+              geom,
+              tile_env,
               4096,
               64,
               true
             ),
             'id': tree_id,
             'dbh': dbh,
-            'category': category,
+            'category': category::VARCHAR,
             'rotation': 0
           } AS feature
         FROM trees_fast
+        JOIN z15_tile_envelopes USING (xtile_z15, ytile_z15)
       )
       SELECT
         xtile,
@@ -269,18 +354,19 @@ def main() -> None:
           ytile_z15 AS ytile,
           {{
             'geom': ST_AsMVTGeom(
-              ST_Point(x_3857, y_3857),
-              ST_Extent(ST_TileEnvelope(15, xtile_z15, ytile_z15)),
+              geom,
+              tile_env,
               4096,
               64,
               true
             ),
             'id': tree_id,
             'dbh': dbh,
-            'category': category,
+            'category': category::VARCHAR,
             'rotation': 0
           }} AS feature
         FROM trees_fast
+        JOIN z15_tile_envelopes USING (xtile_z15, ytile_z15)
         WHERE xtile_z15 BETWEEN {c15x - 3} AND {c15x + 2}
           AND ytile_z15 BETWEEN {c15y - 3} AND {c15y + 2}
       )
@@ -304,18 +390,19 @@ def main() -> None:
           ytile_z15 AS ytile,
           {
             'geom': ST_AsMVTGeom(
-              ST_Point(x_3857, y_3857),
-              ST_Extent(ST_TileEnvelope(15, xtile_z15, ytile_z15)),
+              geom,
+              tile_env,
               4096,
               64,
               true
             ),
             'id': tree_id,
             'dbh': dbh,
-            'category': category,
+            'category': category::VARCHAR,
             'rotation': 0
           } AS feature
-        FROM trees_fast;
+        FROM trees_fast
+        JOIN z15_tile_envelopes USING (xtile_z15, ytile_z15);
         """
       )
       z15_features_ms = (time.perf_counter() - t0) * 1000
@@ -346,18 +433,19 @@ def main() -> None:
             ytile_z15 AS ytile,
             {
               'geom': ST_AsMVTGeom(
-                ST_Point(x_3857, y_3857),
-                ST_Extent(ST_TileEnvelope(15, xtile_z15, ytile_z15)),
+                geom,
+                tile_env,
                 4096,
                 64,
                 true
               ),
               'id': tree_id,
               'dbh': dbh,
-              'category': category,
+              'category': category::VARCHAR,
               'rotation': 0
             } AS feature
           FROM trees_fast
+          JOIN z15_tile_envelopes USING (xtile_z15, ytile_z15)
         )
         SELECT
           xtile,
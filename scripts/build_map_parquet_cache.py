@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import os
+import tempfile
 from pathlib import Path
 
 import duckdb
 
+from parquet_cache import CACHE_DIR, RAW_TREE_COLUMNS, TREE_CATEGORY_ENUM_SQL, ensure_parquet, tree_category_sql
+
 
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
@@ -13,17 +18,70 @@ PUBLIC_CACHE_DIR = ROOT / "src" / "public" / "data" / "cache"
 RAW_JSON = DATA_DIR / "raw_data.json"
 SPECIES_JSON = DATA_DIR / "species_data.json"
 
+TILE_ZOOMS = range(13, 21)
+MAX_TILE_ZOOM = TILE_ZOOMS[-1]
+# Tiles per axis at the deepest zoom, inlined as a SQL literal so DuckDB never calls pow() per row.
+MAX_TILE_SCALE = float(1 << MAX_TILE_ZOOM)
+
+# Snap grid (EPSG:3857 meters) for the per-tile aggregate caches, halving with each zoom
+# down to a 1 m floor at z19/z20.
+AGG_GRID_BY_ZOOM = {13: 64, 14: 32, 15: 16, 16: 8, 17: 4, 18: 2, 19: 1, 20: 1}
+# Only these aggregate zooms are read by the app. The deeper ones are built only with
+# --mvt-tiles and kept in CACHE_DIR, so they are not shipped until something consumes them.
+PUBLIC_AGG_ZOOMS = (13, 14)
+
+# Zooms whose vector tiles are prebuilt with --mvt-tiles, so serving a tile is a keyed parquet
+# read. Nothing serves them yet, so they are opt-in and written to CACHE_DIR rather than the
+# public cache.
+MVT_ZOOMS = (15, 16, 17, 18)
+
+
+def _tile_columns() -> str:
+    # Tiles nest in the pyramid: floor(n * 2^z) == floor(n * 2^20) >> (20 - z) for n >= 0,
+    # so only the deepest zoom is projected and every shallower one is a bit shift.
+    columns = []
+    for z in TILE_ZOOMS:
+        shift = MAX_TILE_ZOOM - z
+        for axis in ("x", "y"):
+            expr = f"{axis}tile_max" if shift == 0 else f"({axis}tile_max >> {shift})"
+            columns.append(f"{expr} AS {axis}tile_z{z}")
+    return ",\n          ".join(columns)
 
-def build() -> None:
+
+def _morton_sql(x: str, y: str, bits: int = MAX_TILE_ZOOM) -> str:
+    # Z-order code: interleave the low `bits` bits of two tile columns so rows that are
+    # close on the map land in the same parquet row groups.
+    terms = []
+    for i in range(bits):
+        terms.append(f"((({x}::BIGINT >> {i}) & 1) << {2 * i})")
+        terms.append(f"((({y}::BIGINT >> {i}) & 1) << {2 * i + 1})")
+    return " | ".join(terms)
+
+
+def build(mvt_tiles: bool = False) -> None:
     if not RAW_JSON.exists():
         raise SystemExit(f"Missing {RAW_JSON}")
 
     PUBLIC_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Spill into a directory private to this run: DuckDB uses fixed spill file names, so
+    # concurrent runs sharing one temp directory overwrite each other's files.
+    with tempfile.TemporaryDirectory(prefix="duckdb-") as spill_dir:
+        con = duckdb.connect(database=":memory:")
+        try:
+            con.execute(f"PRAGMA temp_directory='{Path(spill_dir).as_posix()}'")
+            _populate(con, mvt_tiles)
+        finally:
+            con.close()
 
-    con = duckdb.connect(database=":memory:")
-    con.execute("PRAGMA threads=8")
 
-    con.execute("CREATE OR REPLACE TABLE trees AS SELECT * FROM read_json_auto(?)", [str(RAW_JSON)])
+def _populate(con: duckdb.DuckDBPyConnection, mvt_tiles: bool) -> None:
+    # Use every core and let large sorts/aggregates spill to disk; DuckDB's default
+    # memory_limit (80% of RAM) already scales with the machine.
+    con.execute(f"PRAGMA threads={max(1, os.cpu_count() or 4)}")
+
+    con.execute("CREATE OR REPLACE TABLE trees AS SELECT * FROM read_parquet(?)", [str(ensure_parquet(RAW_JSON, RAW_TREE_COLUMNS))])
 
     if SPECIES_JSON.exists():
         con.execute("CREATE OR REPLACE TABLE species_enrichment AS SELECT * FROM read_json_auto(?)", [str(SPECIES_JSON)])
@@ -47,9 +105,11 @@ def build() -> None:
     con.execute(f"COPY trees TO '{(PUBLIC_CACHE_DIR / 'trees.parquet').as_posix()}' (FORMAT PARQUET)")
     con.execute(f"COPY species_enrichment TO '{(PUBLIC_CACHE_DIR / 'species.parquet').as_posix()}' (FORMAT PARQUET)")
 
-    # Precomputed map-optimized table.
+    # Precomputed map-optimized table. tree_category is an enum so it is mapped once
+    # here and stored dictionary-encoded in parquet.
+    con.execute(f"CREATE TYPE tree_category_enum AS {TREE_CATEGORY_ENUM_SQL}")
     con.execute(
-        """
+        f"""
         CREATE OR REPLACE TABLE trees_fast AS
         WITH joined AS (
           SELECT
@@ -61,30 +121,41 @@ def build() -> None:
             t.latitude,
             t.longitude,
             COALESCE(t.diameter_at_breast_height, 3) AS dbh,
-            CASE lower(trim(COALESCE(se.tree_category, 'default')))
-              WHEN 'palm' THEN 'palm'
-              WHEN 'broadleaf' THEN 'broadleaf'
-              WHEN 'spreading' THEN 'spreading'
-              WHEN 'coniferous' THEN 'coniferous'
-              WHEN 'columnar' THEN 'columnar'
-              WHEN 'ornamental' THEN 'ornamental'
-              ELSE 'default'
-            END AS tree_category,
+            {tree_category_sql('se.tree_category')} AS tree_category,
             se.native_status,
             se.is_evergreen,
             se.mature_height_ft,
             se.bloom_season,
             se.wildlife_value,
             se.fire_risk,
-            LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878) AS latitude_clamped,
-            ((t.longitude + 180.0) / 360.0) AS x_norm,
-            ((1.0 - ln(tan(radians(LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878))) +
-            (1.0 / cos(radians(LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878))))) / pi()) / 2.0) AS y_norm
+            sin(radians(LEAST(GREATEST(t.latitude, -85.05112878), 85.05112878))) AS sin_lat
           FROM trees t
           LEFT JOIN species_enrichment se
             ON t.species = se.species
           WHERE t.latitude IS NOT NULL
             AND t.longitude IS NOT NULL
+        ),
+        -- Clamp and project each latitude once; x/y norms and EPSG:3857 share it.
+        projected AS (
+          SELECT
+            *,
+            ((longitude + 180.0) / 360.0) AS x_norm,
+            -- ln(tan + sec) == 0.5 * ln((1 + sin) / (1 - sin)), with one trig call.
+            (0.5 * ln((1.0 + sin_lat) / (1.0 - sin_lat))) AS mercator_y
+          FROM joined
+        ),
+        normalized AS (
+          SELECT
+            *,
+            ((1.0 - mercator_y / pi()) / 2.0) AS y_norm
+          FROM projected
+        ),
+        tiled AS (
+          SELECT
+            *,
+            CAST(floor(x_norm * {MAX_TILE_SCALE}) AS INTEGER) AS xtile_max,
+            CAST(floor(y_norm * {MAX_TILE_SCALE}) AS INTEGER) AS ytile_max
+          FROM normalized
         )
         SELECT
           tree_id,
@@ -103,49 +174,145 @@ def build() -> None:
           wildlife_value,
           fire_risk,
           ((longitude * 20037508.342789244) / 180.0) AS x_3857,
-          (6378137.0 * ln(tan(pi() / 4.0 + radians(latitude_clamped) / 2.0))) AS y_3857,
-          CAST(floor(x_norm * pow(2, 13)) AS INTEGER) AS xtile_z13,
-          CAST(floor(y_norm * pow(2, 13)) AS INTEGER) AS ytile_z13,
-          CAST(floor(x_norm * pow(2, 14)) AS INTEGER) AS xtile_z14,
-          CAST(floor(y_norm * pow(2, 14)) AS INTEGER) AS ytile_z14,
-          CAST(floor(x_norm * pow(2, 15)) AS INTEGER) AS xtile_z15,
-          CAST(floor(y_norm * pow(2, 15)) AS INTEGER) AS ytile_z15,
-          CAST(floor(x_norm * pow(2, 16)) AS INTEGER) AS xtile_z16,
-          CAST(floor(y_norm * pow(2, 16)) AS INTEGER) AS ytile_z16,
-          CAST(floor(x_norm * pow(2, 17)) AS INTEGER) AS xtile_z17,
-          CAST(floor(y_norm * pow(2, 17)) AS INTEGER) AS ytile_z17,
-          CAST(floor(x_norm * pow(2, 18)) AS INTEGER) AS xtile_z18,
-          CAST(floor(y_norm * pow(2, 18)) AS INTEGER) AS ytile_z18,
-          CAST(floor(x_norm * pow(2, 19)) AS INTEGER) AS xtile_z19,
-          CAST(floor(y_norm * pow(2, 19)) AS INTEGER) AS ytile_z19,
-          CAST(floor(x_norm * pow(2, 20)) AS INTEGER) AS xtile_z20,
-          CAST(floor(y_norm * pow(2, 20)) AS INTEGER) AS ytile_z20
-        FROM joined
+          (6378137.0 * mercator_y) AS y_3857,
+          {_tile_columns()}
+        FROM tiled
+        """
+    )
+    # Cluster by Z-order with small row groups so xtile/ytile range filters can skip
+    # row groups using parquet min/max stats.
+    con.execute(
+        f"""
+        COPY (
+          SELECT * FROM trees_fast
+          ORDER BY {_morton_sql('xtile_z20', 'ytile_z20')}
+        ) TO '{(PUBLIC_CACHE_DIR / 'trees_fast.parquet').as_posix()}' (FORMAT PARQUET, ROW_GROUP_SIZE 16384)
         """
     )
-    con.execute(f"COPY trees_fast TO '{(PUBLIC_CACHE_DIR / 'trees_fast.parquet').as_posix()}' (FORMAT PARQUET)")
 
-    for z, grid in ((13, 64), (14, 32)):
+    # Materialize per-tile aggregates so lookups are a range read on (xtile, ytile) instead
+    # of a GROUP BY over trees_fast. All zooms share one scan via GROUPING SETS; each output
+    # is split back out by its grouping flag.
+    agg_grid_by_zoom = {
+        z: grid for z, grid in AGG_GRID_BY_ZOOM.items() if mvt_tiles or z in PUBLIC_AGG_ZOOMS
+    }
+    snapped_cols = ", ".join(
+        f"xtile_z{z}, ytile_z{z}, "
+        f"floor(x_3857 / {grid}) * {grid} + {grid} / 2.0 AS gx_z{z}, "
+        f"floor(y_3857 / {grid}) * {grid} + {grid} / 2.0 AS gy_z{z}"
+        for z, grid in agg_grid_by_zoom.items()
+    )
+    zoom_keys = [f"xtile_z{z}, ytile_z{z}, gx_z{z}, gy_z{z}" for z in agg_grid_by_zoom]
+    grouped_cols = ", ".join(zoom_keys)
+    grouping_sets = ", ".join(f"({keys})" for keys in zoom_keys)
+    grouping_flags = ", ".join(f"GROUPING(xtile_z{z}) AS grouped_z{z}" for z in agg_grid_by_zoom)
+    con.execute(
+        f"""
+        CREATE OR REPLACE TEMP TABLE agg_cache AS
+        WITH snapped AS (
+          SELECT dbh, {snapped_cols}
+          FROM trees_fast
+        )
+        SELECT
+          {grouped_cols},
+          {grouping_flags},
+          AVG(dbh) AS avg_dbh,
+          COUNT(*) AS point_count
+        FROM snapped
+        GROUP BY GROUPING SETS ({grouping_sets})
+        """
+    )
+    for z in agg_grid_by_zoom:
+        agg_dir = PUBLIC_CACHE_DIR if z in PUBLIC_AGG_ZOOMS else CACHE_DIR
         con.execute(
             f"""
-            CREATE OR REPLACE TABLE agg_z{z}_cache AS
-            SELECT
-              xtile_z{z} AS xtile,
-              ytile_z{z} AS ytile,
-              floor(x_3857 / {grid}) * {grid} + {grid} / 2.0 AS gx,
-              floor(y_3857 / {grid}) * {grid} + {grid} / 2.0 AS gy,
-              AVG(dbh) AS dbh,
-              COUNT(*) AS point_count
-            FROM trees_fast
-            GROUP BY 1, 2, 3, 4
+            COPY (
+              SELECT
+                xtile_z{z} AS xtile,
+                ytile_z{z} AS ytile,
+                gx_z{z} AS gx,
+                gy_z{z} AS gy,
+                avg_dbh AS dbh,
+                point_count
+              FROM agg_cache
+              WHERE grouped_z{z} = 0
+              ORDER BY xtile, ytile
+            ) TO '{(agg_dir / f'agg_z{z}.parquet').as_posix()}' (FORMAT PARQUET)
             """
         )
-        con.execute(
-            f"COPY agg_z{z}_cache TO '{(PUBLIC_CACHE_DIR / f'agg_z{z}.parquet').as_posix()}' (FORMAT PARQUET)"
-        )
 
-    print(f"Wrote parquet cache files under {PUBLIC_CACHE_DIR}")
+    if mvt_tiles:
+        _write_mvt_tiles(con)
+
+    print(f"Wrote parquet cache files under {PUBLIC_CACHE_DIR}" + (f" and {CACHE_DIR}" if mvt_tiles else ""))
+
+
+def _write_mvt_tiles(con: duckdb.DuckDBPyConnection) -> None:
+    # Prebuild MVT tile bytes per (xtile, ytile). Sorted output with the smallest row
+    # group DuckDB writes keeps a lookup on (xtile, ytile) to a single row group read.
+    spatial_ok = True
+    try:
+        con.execute("LOAD spatial;")
+    except Exception:
+        try:
+            con.execute("INSTALL spatial;")
+            con.execute("LOAD spatial;")
+        except Exception:
+            spatial_ok = False
+
+    if spatial_ok:
+        for z in MVT_ZOOMS:
+            con.execute(
+                f"""
+                COPY (
+                  WITH rows AS (
+                    SELECT
+                      xtile_z{z} AS xtile,
+                      ytile_z{z} AS ytile,
+                      {{
+                        'geom': ST_AsMVTGeom(
+                          ST_Point(x_3857, y_3857),
+                          ST_Extent(ST_TileEnvelope({z}, xtile_z{z}, ytile_z{z})),
+                          4096,
+                          64,
+                          true
+                        ),
+                        'id': tree_id,
+                        'dbh': dbh,
+                        'category': tree_category::VARCHAR,
+                        'rotation': 0
+                      }} AS feature
+                    FROM trees_fast
+                  )
+                  SELECT
+                    xtile,
+                    ytile,
+                    ST_AsMVT(feature, 'trees', 4096, 'geom') AS mvt
+                  FROM rows
+                  WHERE feature.geom IS NOT NULL AND NOT ST_IsEmpty(feature.geom)
+                  GROUP BY xtile, ytile
+                  ORDER BY xtile, ytile
+                ) TO '{(CACHE_DIR / f'mvt_z{z}.parquet').as_posix()}'
+                (FORMAT PARQUET, ROW_GROUP_SIZE 2048, COMPRESSION ZSTD)
+                """
+            )
+    else:
+        print("Skipped mvt_z*.parquet (spatial extension unavailable)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--mvt-tiles",
+        action="store_true",
+        help=(
+            f"Also prebuild MVT tiles for z{MVT_ZOOMS[0]}-z{MVT_ZOOMS[-1]} (needs the spatial extension) and "
+            f"z{PUBLIC_AGG_ZOOMS[-1] + 1}-z{max(AGG_GRID_BY_ZOOM)} aggregates into {CACHE_DIR}; nothing reads them yet"
+        ),
+    )
+    args = parser.parse_args()
+    build(mvt_tiles=args.mvt_tiles)
 
 
 if __name__ == "__main__":
-    build()
+    main()
@@ -0,0 +1,68 @@
+"""Typed parquet copies of the data/ JSON exports and the tree category enum, shared by the
+scripts in this directory."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / ".cache"
+
+# Columns read from raw_data.json, typed up front so DuckDB skips schema inference.
+RAW_TREE_COLUMNS = {
+    "tree_id": "BIGINT",
+    "common_name": "VARCHAR",
+    "site_info": "VARCHAR",
+    "plant_date": "VARCHAR",
+    "species": "VARCHAR",
+    "latitude": "DOUBLE",
+    "longitude": "DOUBLE",
+    "diameter_at_breast_height": "BIGINT",
+}
+
+# Values of tree_category_enum, in enum order. Unknown or missing categories map to "default".
+TREE_CATEGORIES = ("palm", "broadleaf", "spreading", "coniferous", "columnar", "ornamental", "default")
+TREE_CATEGORY_ENUM_SQL = "ENUM ({})".format(", ".join(f"'{c}'" for c in TREE_CATEGORIES))
+
+
+def tree_category_sql(column: str) -> str:
+    """SQL that normalizes a free-text category column and casts it to tree_category_enum.
+
+    Generated from TREE_CATEGORIES so the CASE can never name a value the enum lacks.
+    """
+    branches = " ".join(f"WHEN '{c}' THEN '{c}'" for c in TREE_CATEGORIES if c != "default")
+    return (
+        f"CAST(CASE lower(trim(COALESCE({column}, 'default'))) {branches} ELSE 'default' END "
+        "AS tree_category_enum)"
+    )
+
+
+def ensure_parquet(json_path: Path, columns: dict[str, str]) -> Path:
+    """Convert a JSON export to parquet once and reuse it until the JSON changes.
+
+    The explicit column types let read_json parse in a single pass without schema
+    inference, and the typed, columnar parquet copy skips JSON parsing on later runs.
+    The cache file name carries a digest of the column projection, so callers that
+    read different columns from the same export never reuse each other's copy.
+    """
+    columns_sql = ", ".join(f"'{name}': '{sql_type}'" for name, sql_type in columns.items())
+    digest = hashlib.sha1(columns_sql.encode()).hexdigest()[:8]
+    parquet_path = CACHE_DIR / f"{json_path.stem}.{digest}.parquet"
+    if parquet_path.exists() and parquet_path.stat().st_mtime >= json_path.stat().st_mtime:
+        return parquet_path
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # A per-process temp name keeps concurrent conversions of the same export from writing
+    # into one file; whichever finishes last publishes a complete copy.
+    tmp_path = parquet_path.with_suffix(f".parquet.{os.getpid()}.tmp")
+    duckdb.execute(
+        f"COPY (SELECT * FROM read_json(?, columns = {{{columns_sql}}})) "
+        f"TO '{tmp_path.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD)",
+        [str(json_path)],
+    )
+    tmp_path.replace(parquet_path)
+    return parquet_path
@@ -8,6 +8,9 @@ triggered per detailed zoom level (z>=15).
 It can also parse exported console JSON/NDJSON logs and count actual unique
 batch ranges by zoom from SQL text.
 
+Requires NumPy (listed in requirements.txt); orjson and google-re2 are used when
+installed and otherwise fall back to the standard library.
+
 Usage examples:
   C:/Users/ethan/coding_projects/sf_tree_reporting/.venv/Scripts/python.exe scripts/simulate_intro_query_batches.py
   C:/Users/ethan/coding_projects/sf_tree_reporting/.venv/Scripts/python.exe scripts/simulate_intro_query_batches.py --fps 60 --width 1728 --height 1117
@@ -17,12 +20,26 @@ Usage examples:
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import math
 import re
+import sys
 from collections import Counter, defaultdict
-from dataclasses import dataclass
+from collections.abc import Iterator
 from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING, NamedTuple
+
+# NumPy and orjson are imported where they are first used, so `--help` and plain
+# imports of this module skip their load time.
+if TYPE_CHECKING:
+    import numpy as np
+
+try:
+    import re2 as _sql_re  # google-re2: linear-time matching, same results for SQL_TILE_RE
+except ImportError:
+    _sql_re = re
 
 INTRO_CENTER = (-122.4194, 37.7749)
 INTRO_START_ZOOM = 18.5
@@ -31,16 +48,27 @@ INTRO_DURATION_MS = 10_000
 INTRO_ROTATION_DEG = 240  # retained for parity, not needed for range math
 CHECKPOINTS = [INTRO_START_ZOOM, 17.6, 16.8, 16.0, 15.2, 14.3, INTRO_END_ZOOM]
 
+_TWO_PI = 2 * math.pi
+# cos(latitude) at the intro center; dividing longitude offsets by it keeps the orbit round on the map.
+_LNG_SCALE = max(0.2, math.cos(math.radians(INTRO_CENTER[1])))
+
 WEB_MERCATOR_MAX_LAT = 85.05112878
 TILE_SIZE = 512  # map style uses raster tileSize 512; good approximation for world size math
 
-SQL_Z_RE = re.compile(r"ST_TileEnvelope\((\d+),", re.IGNORECASE)
-SQL_X_RE = re.compile(r"xtile(?:_z\d+)?\s+BETWEEN\s+(-?\d+)\s+AND\s+(-?\d+)", re.IGNORECASE)
-SQL_Y_RE = re.compile(r"ytile(?:_z\d+)?\s+BETWEEN\s+(-?\d+)\s+AND\s+(-?\d+)", re.IGNORECASE)
+# One alternation picks up the zoom and both tile ranges in a single pass over the SQL,
+# whichever order they appear in (the worker emits the BETWEEN filters first). Flags are
+# inline so the pattern compiles unchanged under either regex engine.
+SQL_TILE_RE = _sql_re.compile(
+    r"(?i)ST_TileEnvelope\((?P<z>\d+),"
+    r"|xtile(?:_z\d+)?\s+BETWEEN\s+(?P<min_x>-?\d+)\s+AND\s+(?P<max_x>-?\d+)"
+    r"|ytile(?:_z\d+)?\s+BETWEEN\s+(?P<min_y>-?\d+)\s+AND\s+(?P<max_y>-?\d+)"
+)
+
+# Offset that maps any 32-bit signed tile index into an unsigned 32-bit field.
+_RANGE_FIELD_BIAS = 1 << 31
 
 
-@dataclass(frozen=True)
-class TileRange:
+class TileRange(NamedTuple):
     z: int
     min_x: int
     max_x: int
@@ -51,11 +79,21 @@ class TileRange:
         return f"{revision}:{self.z}:{self.min_x}-{self.max_x}:{self.min_y}-{self.max_y}"
 
 
+class Frames(NamedTuple):
+    """Intro frames as parallel arrays, one element per frame, and the fps they were built at."""
+
+    zoom: np.ndarray
+    lng: np.ndarray
+    lat: np.ndarray
+    stage_idx: np.ndarray
+    fps: int
+
+
 def clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, v))
 
 
-def ease_smoothstep(t: float) -> float:
+def ease_smoothstep(t: float | np.ndarray) -> float | np.ndarray:
     return t * t * (3 - 2 * t)
 
 
@@ -63,15 +101,14 @@ def lonlat_to_world_px(lon: float, lat: float, zoom: float) -> tuple[float, floa
     lat = clamp(lat, -WEB_MERCATOR_MAX_LAT, WEB_MERCATOR_MAX_LAT)
     world = TILE_SIZE * (2**zoom)
     x = ((lon + 180.0) / 360.0) * world
-    sin_lat = math.sin(math.radians(lat))
-    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * world
+    y = (0.5 - math.asinh(math.tan(math.radians(lat))) / _TWO_PI) * world
     return x, y
 
 
 def world_px_to_lonlat(x: float, y: float, zoom: float) -> tuple[float, float]:
     world = TILE_SIZE * (2**zoom)
     lon = (x / world) * 360.0 - 180.0
-    n = math.pi - (2 * math.pi * y) / world
+    n = math.pi - (_TWO_PI * y) / world
     lat = math.degrees(math.atan(math.sinh(n)))
     return lon, lat
 
@@ -87,19 +124,19 @@ def approx_bounds(center_lng: float, center_lat: float, zoom: float, width_px: i
 
 
 def lon_to_tile_x(lon: float, z: int) -> int:
-    n = 2**z
+    n = 1 << z
     return math.floor(((lon + 180.0) / 360.0) * n)
 
 
 def lat_to_tile_y(lat: float, z: int) -> int:
     lat = clamp(lat, -WEB_MERCATOR_MAX_LAT, WEB_MERCATOR_MAX_LAT)
-    lat_rad = math.radians(lat)
-    n = 2**z
-    return math.floor(((1 - math.log(math.tan(lat_rad) + 1 / math.cos(lat_rad)) / math.pi) / 2) * n)
+    n = 1 << z
+    # asinh(tan(lat)) == ln(tan(lat) + sec(lat)) with two transcendental calls instead of three.
+    return math.floor(((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2) * n)
 
 
 def tile_range_for_view(z: int, west: float, east: float, north: float, south: float) -> TileRange:
-    n = 2**z
+    n = 1 << z
     min_x = max(0, min(n - 1, lon_to_tile_x(west, z)))
     max_x = max(0, min(n - 1, lon_to_tile_x(east, z)))
     min_y = max(0, min(n - 1, lat_to_tile_y(north, z)))
@@ -107,9 +144,48 @@ def tile_range_for_view(z: int, west: float, east: float, north: float, south: f
     return TileRange(z=z, min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y)
 
 
-def generate_intro_frames(fps: int) -> list[tuple[float, float, float, int]]:
-    """Return [(zoom, lng, lat, stage_index)]."""
-    frames: list[tuple[float, float, float, int]] = []
+def tile_ranges_for_frames(frames: Frames, width_px: int, height_px: int) -> np.ndarray:
+    """Vectorized approx_bounds + tile_range_for_view over every z>=15 frame.
+
+    Returns an (M, 5) int array of [z, min_x, max_x, min_y, max_y] rows.
+    """
+    import numpy as np
+
+    zoom, lng, lat = frames.zoom, frames.lng, frames.lat
+    z = np.round(zoom)
+    detailed = z >= 15
+    zoom, lng, lat, z = zoom[detailed], lng[detailed], lat[detailed], z[detailed].astype(np.int64)
+
+    # approx_bounds: viewport center in world pixels, then its corners back to lon/lat.
+    world = TILE_SIZE * (2**zoom)
+    cx = ((lng + 180.0) / 360.0) * world
+    lat_rad = np.radians(np.clip(lat, -WEB_MERCATOR_MAX_LAT, WEB_MERCATOR_MAX_LAT))
+    cy = (0.5 - np.arcsinh(np.tan(lat_rad)) / _TWO_PI) * world
+    half_w = width_px / 2.0
+    half_h = height_px / 2.0
+    west = ((cx - half_w) / world) * 360.0 - 180.0
+    east = ((cx + half_w) / world) * 360.0 - 180.0
+    north = np.degrees(np.arctan(np.sinh(math.pi - (_TWO_PI * (cy - half_h)) / world)))
+    south = np.degrees(np.arctan(np.sinh(math.pi - (_TWO_PI * (cy + half_h)) / world)))
+
+    # tile_range_for_view
+    n = np.left_shift(1, z)
+
+    def tile_x(lon: np.ndarray) -> np.ndarray:
+        return np.clip(np.floor(((lon + 180.0) / 360.0) * n).astype(np.int64), 0, n - 1)
+
+    def tile_y(lat_deg: np.ndarray) -> np.ndarray:
+        lat_rad = np.radians(np.clip(lat_deg, -WEB_MERCATOR_MAX_LAT, WEB_MERCATOR_MAX_LAT))
+        return np.clip(np.floor(((1 - np.arcsinh(np.tan(lat_rad)) / math.pi) / 2) * n).astype(np.int64), 0, n - 1)
+
+    return np.column_stack((z, tile_x(west), tile_x(east), tile_y(north), tile_y(south)))
+
+
+def generate_intro_frames(fps: int) -> Frames:
+    """Return the intro camera path as parallel per-frame arrays."""
+    import numpy as np
+
+    columns: dict[str, list[np.ndarray]] = {"zoom": [], "lng": [], "lat": [], "stage_idx": []}
     segments = len(CHECKPOINTS) - 1
     segment_duration_ms = round(INTRO_DURATION_MS / segments)
 
@@ -120,27 +196,29 @@ def generate_intro_frames(fps: int) -> list[tuple[float, float, float, int]]:
         to_t = (i + 1) / segments
 
         frame_count = max(1, round((segment_duration_ms / 1000.0) * fps))
-        for f in range(frame_count):
-            local = f / frame_count
-            eased_local = ease_smoothstep(local)
-            global_t = from_t + (to_t - from_t) * eased_local
-
-            zoom = from_zoom + (to_zoom - from_zoom) * eased_local
-            angle = global_t * math.pi * 2
-            radius_deg = 0.0012 * (1 - global_t)
-            lng = INTRO_CENTER[0] + (math.cos(angle) * radius_deg) / max(0.2, math.cos(math.radians(INTRO_CENTER[1])))
-            lat = INTRO_CENTER[1] + math.sin(angle) * radius_deg
-            frames.append((zoom, lng, lat, i))
+        local = np.arange(frame_count) / frame_count
+        eased_local = ease_smoothstep(local)
+        global_t = from_t + (to_t - from_t) * eased_local
+
+        zoom = from_zoom + (to_zoom - from_zoom) * eased_local
+        angle = global_t * _TWO_PI
+        radius_deg = 0.0012 * (1 - global_t)
+        lng = INTRO_CENTER[0] + (np.cos(angle) * radius_deg) / _LNG_SCALE
+        lat = INTRO_CENTER[1] + np.sin(angle) * radius_deg
 
         # Ensure segment end checkpoint frame is represented (where stage prefetch happens).
         global_t = to_t
-        angle = global_t * math.pi * 2
+        angle = global_t * _TWO_PI
         radius_deg = 0.0012 * (1 - global_t)
-        lng = INTRO_CENTER[0] + (math.cos(angle) * radius_deg) / max(0.2, math.cos(math.radians(INTRO_CENTER[1])))
-        lat = INTRO_CENTER[1] + math.sin(angle) * radius_deg
-        frames.append((to_zoom, lng, lat, i))
+        end_lng = INTRO_CENTER[0] + (math.cos(angle) * radius_deg) / _LNG_SCALE
+        end_lat = INTRO_CENTER[1] + math.sin(angle) * radius_deg
+
+        columns["zoom"].append(np.append(zoom, to_zoom))
+        columns["lng"].append(np.append(lng, end_lng))
+        columns["lat"].append(np.append(lat, end_lat))
+        columns["stage_idx"].append(np.full(frame_count + 1, i))
 
-    return frames
+    return Frames(**{name: np.concatenate(parts) for name, parts in columns.items()}, fps=fps)
 
 
 def simulate_batch_keys(
@@ -149,6 +227,7 @@ def simulate_batch_keys(
     height_px: int,
     freeze_visible_range_per_stage: bool,
     freeze_visible_range_per_zoom: bool,
+    frames: Frames | None = None,
 ) -> dict[str, object]:
     """Model neighborhood batch key creation for z>=15.
 
@@ -156,69 +235,60 @@ def simulate_batch_keys(
     - At least one tile request occurs each frame for the active rounded zoom.
     - useDuckDB neighborhood batch key is revision + z + visible range.
     - prefetchVisibleDetailTilesAtZoom is called at each stage boundary for z>=15.
+      Its range is the checkpoint frame that ends each segment of
+      generate_intro_frames, so it goes through the same key path as any frame.
+
+    Pass `frames` (from generate_intro_frames(fps)) to reuse them across calls; they
+    must have been generated at the same `fps`.
     """
     revision = 1
-    seen_keys: set[str] = set()
-    keys_by_zoom: dict[int, set[str]] = defaultdict(set)
-    count_by_zoom: Counter[int] = Counter()
-
-    frames = generate_intro_frames(fps)
+    # Keys are (revision, z, min_x, max_x, min_y, max_y) tuples: the same identity as
+    # TileRange.key() without formatting a string per frame. Keys embed z, so one set
+    # per zoom is both the dedupe and the count.
+    keys_by_zoom: dict[int, set[tuple[int, int, int, int, int, int]]] = defaultdict(set)
+
+    if frames is None:
+        frames = generate_intro_frames(fps)
+    elif frames.fps != fps:
+        raise ValueError(f"frames were generated at {frames.fps} fps, not {fps}")
     frozen_range_by_stage_zoom: dict[tuple[int, int], TileRange] = {}
     frozen_range_by_zoom: dict[int, TileRange] = {}
 
-    for zoom, lng, lat, stage_idx in frames:
-        z = round(zoom)
-        if z < 15:
-            continue
-
-        west, east, north, south = approx_bounds(lng, lat, zoom, width_px, height_px)
-        tr = tile_range_for_view(z, west, east, north, south)
-
-        if freeze_visible_range_per_zoom:
-            if z not in frozen_range_by_zoom:
-                frozen_range_by_zoom[z] = tr
-            tr = frozen_range_by_zoom[z]
-        elif freeze_visible_range_per_stage:
-            skey = (stage_idx, z)
-            if skey not in frozen_range_by_stage_zoom:
-                frozen_range_by_stage_zoom[skey] = tr
-            tr = frozen_range_by_stage_zoom[skey]
-
-        key = tr.key(revision=revision)
-        if key not in seen_keys:
-            seen_keys.add(key)
-            keys_by_zoom[z].add(key)
-            count_by_zoom[z] += 1
-
-    # Stage-boundary prefetch calls (same dedupe key path).
-    for cp in CHECKPOINTS[1:]:
-        z = round(cp)
-        if z < 15:
-            continue
-        # prefetch uses current visible range; in this model it is already represented
-        # by the final frame(s). If a missing key appears, add it.
-        zoom = cp
-        global_t = CHECKPOINTS.index(cp) / (len(CHECKPOINTS) - 1)
-        angle = global_t * math.pi * 2
-        radius_deg = 0.0012 * (1 - global_t)
-        lng = INTRO_CENTER[0] + (math.cos(angle) * radius_deg) / max(0.2, math.cos(math.radians(INTRO_CENTER[1])))
-        lat = INTRO_CENTER[1] + math.sin(angle) * radius_deg
-        west, east, north, south = approx_bounds(lng, lat, zoom, width_px, height_px)
-        tr = tile_range_for_view(z, west, east, north, south)
-
-        if freeze_visible_range_per_zoom:
-            tr = frozen_range_by_zoom.get(z, tr)
-        elif freeze_visible_range_per_stage:
-            stage_idx = CHECKPOINTS.index(cp) - 1
-            skey = (stage_idx, z)
-            tr = frozen_range_by_stage_zoom.get(skey, tr)
-
-        key = tr.key(revision=revision)
-        if key not in seen_keys:
-            seen_keys.add(key)
-            keys_by_zoom[z].add(key)
-            count_by_zoom[z] += 1
+    if freeze_visible_range_per_stage or freeze_visible_range_per_zoom:
+        frame_ranges: list[TileRange] = []
+        # The frozen maps double as a cache: bounds are only computed for the first
+        # frame of each zoom (or stage/zoom pair); later frames reuse that range.
+        for zoom, lng, lat, stage_idx in zip(
+            frames.zoom.tolist(), frames.lng.tolist(), frames.lat.tolist(), frames.stage_idx.tolist()
+        ):
+            z = round(zoom)
+            if z < 15:
+                continue
 
+            if freeze_visible_range_per_zoom:
+                tr = frozen_range_by_zoom.get(z)
+                if tr is None:
+                    tr = tile_range_for_view(z, *approx_bounds(lng, lat, zoom, width_px, height_px))
+                    frozen_range_by_zoom[z] = tr
+            else:
+                skey = (stage_idx, z)
+                tr = frozen_range_by_stage_zoom.get(skey)
+                if tr is None:
+                    tr = tile_range_for_view(z, *approx_bounds(lng, lat, zoom, width_px, height_px))
+                    frozen_range_by_stage_zoom[skey] = tr
+            frame_ranges.append(tr)
+    else:
+        # Without freezing every frame's range is independent, so compute them all at
+        # once and only walk the distinct ones.
+        import numpy as np
+
+        distinct = np.unique(tile_ranges_for_frames(frames, width_px, height_px), axis=0)
+        frame_ranges = [TileRange(*row) for row in distinct.tolist()]
+
+    for tr in frame_ranges:
+        keys_by_zoom[tr.z].add((revision, *tr))
+
+    count_by_zoom = {z: len(keys) for z, keys in keys_by_zoom.items()}
     total = sum(count_by_zoom.values())
     return {
         "fps": fps,
@@ -230,28 +300,107 @@ def simulate_batch_keys(
     }
 
 
+def pack_tile_range(min_x: int, max_x: int, min_y: int, max_y: int) -> int:
+    """Pack a tile range into one int (32 bits per bound) for cheap set membership."""
+    return (
+        (min_x + _RANGE_FIELD_BIAS) << 96
+        | (max_x + _RANGE_FIELD_BIAS) << 64
+        | (min_y + _RANGE_FIELD_BIAS) << 32
+        | (max_y + _RANGE_FIELD_BIAS)
+    )
+
+
+def match_tile_query(sql_text: str) -> tuple[int, int, int, int, int] | None:
+    """Return (z, min_x, max_x, min_y, max_y) from the first match of each part, if all are present."""
+    z: int | None = None
+    x_range: tuple[int, int] | None = None
+    y_range: tuple[int, int] | None = None
+    for m in SQL_TILE_RE.finditer(sql_text):
+        if m.group("z") is not None:
+            if z is None:
+                z = int(m.group("z"))
+        elif m.group("min_x") is not None:
+            if x_range is None:
+                x_range = (int(m.group("min_x")), int(m.group("max_x")))
+        elif y_range is None:
+            y_range = (int(m.group("min_y")), int(m.group("max_y")))
+
+        if z is not None and x_range is not None and y_range is not None:
+            return z, *x_range, *y_range
+    return None
+
+
+@functools.cache
+def _optional_orjson() -> ModuleType | None:
+    try:
+        import orjson
+    except ImportError:  # optional speedup; callers fall back to stdlib json
+        return None
+    return orjson
+
+
+def _json_dumps(obj: object) -> str:
+    orjson = _optional_orjson()
+    if orjson is None:
+        return json.dumps(obj, indent=2)
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _json_loads(text: str) -> object:
+    orjson = _optional_orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson rejects lone surrogate escapes and NaN/Infinity, which browser console
+            # exports can contain; stdlib json accepts them, so retry those lines there.
+            pass
+    return json.loads(text)
+
+
+def iter_lines_containing(path: Path, needle: bytes, block_size: int = 1 << 20) -> Iterator[bytes]:
+    """Yield the raw lines of `path` that contain `needle`.
+
+    The file is searched in large byte blocks and only matching lines are sliced out,
+    so unrelated console lines are never split, decoded or parsed individually.
+    """
+    with path.open("rb") as log:
+        tail = b""
+        while block := log.read(block_size):
+            buf = tail + block
+            end = buf.rfind(b"\n") + 1  # buf[:end] holds only complete lines
+            tail = buf[end:]
+            pos = buf.find(needle, 0, end)
+            while pos != -1:
+                start = buf.rfind(b"\n", 0, pos) + 1
+                stop = buf.find(b"\n", pos, end)
+                yield buf[start:stop]
+                pos = buf.find(needle, stop + 1, end)
+        if needle in tail:
+            yield tail
+
+
 def parse_log_file(path: Path) -> dict[str, object]:
     if not path.exists():
         raise FileNotFoundError(path)
 
     total_sql = 0
     by_zoom_total: Counter[int] = Counter()
-    by_zoom_unique_ranges: dict[int, set[tuple[int, int, int, int]]] = defaultdict(set)
+    by_zoom_unique_ranges: dict[int, set[int]] = defaultdict(set)
 
-    for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
-        line = line.strip()
-        if not line:
+    for raw_line in iter_lines_containing(path, b"ST_AsMVT"):
+        if b'"value"' not in raw_line:
             continue
 
-        sql_text = ""
+        line = raw_line.decode("utf-8", errors="ignore").strip()
         if line.startswith("{") and line.endswith("}"):
             try:
-                obj = json.loads(line)
-                value = obj.get("value")
-                if isinstance(value, str):
-                    sql_text = value
+                obj = _json_loads(line)
             except Exception:
                 continue
+            sql_text = obj.get("value")
+            if not isinstance(sql_text, str):
+                continue
         else:
             # fallback: raw sql line chunks unsupported; skip
             continue
@@ -259,19 +408,14 @@ def parse_log_file(path: Path) -> dict[str, object]:
         if "ST_AsMVT" not in sql_text:
             continue
 
-        z_match = SQL_Z_RE.search(sql_text)
-        x_match = SQL_X_RE.search(sql_text)
-        y_match = SQL_Y_RE.search(sql_text)
-        if not (z_match and x_match and y_match):
+        tile_query = match_tile_query(sql_text)
+        if tile_query is None:
             continue
 
-        z = int(z_match.group(1))
-        min_x, max_x = int(x_match.group(1)), int(x_match.group(2))
-        min_y, max_y = int(y_match.group(1)), int(y_match.group(2))
-
+        z, min_x, max_x, min_y, max_y = tile_query
         total_sql += 1
         by_zoom_total[z] += 1
-        by_zoom_unique_ranges[z].add((min_x, max_x, min_y, max_y))
+        by_zoom_unique_ranges[z].add(pack_tile_range(min_x, max_x, min_y, max_y))
 
     return {
         "log_file": str(path),
@@ -307,12 +451,15 @@ def main() -> None:
     parser.add_argument("--log-file", type=Path, default=None, help="Optional JSON/NDJSON console export with SQL in .value")
     args = parser.parse_args()
 
+    # All three variants replay the same intro path.
+    frames = generate_intro_frames(args.fps)
     sim_dynamic = simulate_batch_keys(
         fps=args.fps,
         width_px=args.width,
         height_px=args.height,
         freeze_visible_range_per_stage=False,
         freeze_visible_range_per_zoom=False,
+        frames=frames,
     )
     sim_frozen = simulate_batch_keys(
         fps=args.fps,
@@ -320,6 +467,7 @@ def main() -> None:
         height_px=args.height,
         freeze_visible_range_per_stage=True,
         freeze_visible_range_per_zoom=False,
+        frames=frames,
     )
     sim_zoom_locked = simulate_batch_keys(
         fps=args.fps,
@@ -327,21 +475,24 @@ def main() -> None:
         height_px=args.height,
         freeze_visible_range_per_stage=False,
         freeze_visible_range_per_zoom=True,
+        frames=frames,
     )
 
-    print("Simulation (current behavior, frame-updated visible range):")
-    print(json.dumps(sim_dynamic, indent=2))
-    print("\nSimulation (stage-locked visible range):")
-    print(json.dumps(sim_frozen, indent=2))
-    print("\nSimulation (zoom-locked visible range):")
-    print(json.dumps(sim_zoom_locked, indent=2))
+    sections = [
+        "Simulation (current behavior, frame-updated visible range):",
+        _json_dumps(sim_dynamic),
+        "\nSimulation (stage-locked visible range):",
+        _json_dumps(sim_frozen),
+        "\nSimulation (zoom-locked visible range):",
+        _json_dumps(sim_zoom_locked),
+    ]
 
     parsed = None
     if args.log_file:
         parsed = parse_log_file(args.log_file)
-        print("\nObserved from log file:")
-        print(json.dumps(parsed, indent=2))
+        sections += ["\nObserved from log file:", _json_dumps(parsed)]
 
+    sys.stdout.write("\n".join(sections) + "\n")
     print_recommendation(sim_dynamic, sim_frozen, parsed)
 
 